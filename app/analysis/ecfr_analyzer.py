@@ -1,5 +1,6 @@
 from app.database.db import RegulationDAO
 from collections import Counter
+import math
 import re
 import requests
 from typing import Dict, List, Any
@@ -70,4 +71,25 @@ class eCFRAnalyzer:
             all_text = " ".join(row[0] for row in results)
             words = re.findall(r'\w+', all_text.lower())
             common = Counter(words).most_common(10)
-            return common
\ No newline at end of file
+            return common
+
+    @staticmethod
+    def bin_word_counts(word_counts: Dict[str, int], top_n: int = 25) -> Dict[str, List[Any]]:
+        """Keep the top_n agencies by word count and fold the rest into an 'Other' bin."""
+        ranked = sorted(word_counts.items(), key=lambda item: item[1], reverse=True)
+        head, tail = ranked[:top_n], ranked[top_n:]
+        other = sum(count for _, count in tail)
+        if other:
+            head.append(("Other", other))
+        return {"labels": [agency for agency, _ in head], "values": [count for _, count in head]}
+
+    @staticmethod
+    def bin_changes(changes: List[List[Any]], max_points: int = 60) -> Dict[str, List[Any]]:
+        """Sum consecutive daily change counts into at most max_points bins, labelled by their first date."""
+        bin_size = max(1, math.ceil(len(changes) / max_points)) if max_points > 0 else 1
+        dates, counts = [], []
+        for start in range(0, len(changes), bin_size):
+            chunk = changes[start:start + bin_size]
+            dates.append(chunk[0][0])
+            counts.append(sum(count for _, count in chunk))
+        return {"dates": dates, "counts": counts}
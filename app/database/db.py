@@ -1,28 +1,36 @@
 import sqlite3
-from typing import Optional, List, Tuple
+import threading
+from itertools import islice
+from typing import Callable, Optional, List, Tuple, Dict, Iterator, Sequence
 
 DATABASE_FILE = "ecfr.db"
 
 class RegulationDAO:
     def __init__(self, db_file: str = DATABASE_FILE):
         self.db_file = db_file
+        # One DAO is shared by request handlers and background jobs, so each thread keeps its own connection.
+        self._local = threading.local()
 
     def __enter__(self):
-        self.conn = sqlite3.connect(self.db_file)
-        return self.conn.cursor()
+        self._local.conn = sqlite3.connect(self.db_file)
+        return self._local.conn.cursor()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.conn:
+        conn = getattr(self._local, "conn", None)
+        if conn:
             if exc_type:
-                self.conn.rollback()
+                conn.rollback()
             else:
-                self.conn.commit()
-            self.conn.close()
+                conn.commit()
+            conn.close()
+            self._local.conn = None
 
-    def create_tables(self):
+    def create_tables(self, reset: bool = False):
+        """Create the tables if they are missing; reset=True drops existing data first."""
         with self as cursor:
-            cursor.execute("DROP TABLE IF EXISTS regulations")
-            cursor.execute("DROP TABLE IF EXISTS changes")
+            if reset:
+                cursor.execute("DROP TABLE IF EXISTS regulations")
+                cursor.execute("DROP TABLE IF EXISTS changes")
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS regulations (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -43,11 +51,14 @@ class RegulationDAO:
                     new_hash TEXT
                 )
             """)
+            # One snapshot per (title, section, date); also serves the neighbour lookups in store_snapshot.
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_regulations_title_section_date ON regulations (title, section_id, date)")
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_changes_title_section_date ON changes (title, section_id, date)")
 
     def insert_regulation(self, title: str, section_id: str, date: str, hash_value: str, content: str):
         with self as cursor:
             cursor.execute("""
-                INSERT INTO regulations (title, section_id, date, hash, content)
+                INSERT OR REPLACE INTO regulations (title, section_id, date, hash, content)
                 VALUES (?, ?, ?, ?, ?)
             """, (title, section_id, date, hash_value, content))
 
@@ -64,15 +75,102 @@ class RegulationDAO:
             result = cursor.fetchone()
             return result[0] if result else None
 
+    def get_adjacent_content(self, title: str, section_id: str, date: str, before: bool = True) -> Optional[Tuple[str, str]]:
+        """Return (date, content) of the nearest stored snapshot before (or after) date, if any."""
+        comparison, order = ("<", "DESC") if before else (">", "ASC")
+        with self as cursor:
+            cursor.execute(f"""
+                SELECT date, content FROM regulations
+                WHERE title = ? AND section_id = ? AND date {comparison} ?
+                ORDER BY date {order} LIMIT 1
+            """, (title, section_id, date))
+            return cursor.fetchone()
+
+    def store_snapshot(self, title: str, section_id: str, date: str, hash_value: str, content: str,
+                       prev_date: Optional[str], next_date: Optional[str],
+                       changes: Dict[str, List[Tuple[str, Optional[str], Optional[str]]]]) -> bool:
+        """Atomically store a snapshot and replace the changes rows of the given dates.
+
+        changes maps a date to its (changed_section_id, old_hash, new_hash) rows, and
+        was computed against the neighbours prev_date and next_date. If another
+        snapshot for the title landed between them in the meantime, nothing is
+        written and False is returned so the caller can recompute.
+        """
+        with self as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            neighbours = []
+            for comparison, order in (("<", "DESC"), (">", "ASC")):
+                cursor.execute(f"""
+                    SELECT date FROM regulations
+                    WHERE title = ? AND section_id = ? AND date {comparison} ?
+                    ORDER BY date {order} LIMIT 1
+                """, (title, section_id, date))
+                row = cursor.fetchone()
+                neighbours.append(row[0] if row else None)
+            if neighbours != [prev_date, next_date]:
+                return False
+            cursor.execute("""
+                INSERT OR REPLACE INTO regulations (title, section_id, date, hash, content)
+                VALUES (?, ?, ?, ?, ?)
+            """, (title, section_id, date, hash_value, content))
+            for change_date, rows in changes.items():
+                cursor.execute("DELETE FROM changes WHERE title = ? AND date = ?", (title, change_date))
+                cursor.executemany("""
+                    INSERT INTO changes (title, section_id, date, old_hash, new_hash)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [(title, changed_section, change_date, old_hash, new_hash) for changed_section, old_hash, new_hash in rows])
+        return True
+
     def insert_change(self, title: str, section_id: str, date: str, old_hash: str, new_hash: str):
         with self as cursor:
             cursor.execute("""
-                INSERT INTO changes (title, section_id, date, old_hash, new_hash)
+                INSERT OR REPLACE INTO changes (title, section_id, date, old_hash, new_hash)
                 VALUES (?, ?, ?, ?, ?)
             """, (title, section_id, date, old_hash, new_hash))
 
+    def get_data_version(self) -> Dict[str, str]:
+        """Return a cheap version tag per table, derived from its most recent row.
+
+        The tag changes whenever a row is inserted, so callers can use it to key
+        caches of derived data without scanning the tables.
+        """
+        with self as cursor:
+            cursor.execute("SELECT id, hash FROM regulations ORDER BY id DESC LIMIT 1")
+            regulation = cursor.fetchone()
+            cursor.execute("SELECT id, new_hash FROM changes ORDER BY id DESC LIMIT 1")
+            change = cursor.fetchone()
+        return {
+            "regulations": f"{regulation[0]}:{regulation[1]}" if regulation else "0",
+            "changes": f"{change[0]}:{change[1]}" if change else "0",
+        }
+
     def get_regulations(self) -> List[Tuple]:
         with sqlite3.connect(self.db_file) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM regulations")
-            return cursor.fetchall()
\ No newline at end of file
+            return cursor.fetchall()
+
+    def iter_rows(self, query: str, params: Sequence = (), chunk_size: int = 1000,
+                  transform: Callable[[Tuple], Tuple] = None) -> Iterator[List[Tuple]]:
+        """Yield the rows of query in lists of at most chunk_size, holding only one chunk in memory.
+
+        With transform, each row is transformed as it is fetched and the results are
+        chunked, so large columns the transform reduces (such as content) are held one
+        row at a time. Uses its own connection so callers can interleave other DAO calls
+        while iterating. The connection may be used from whichever thread advances the
+        iterator, as Starlette does when streaming a sync iterator; it is never shared concurrently.
+        """
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            while True:
+                if transform:
+                    rows = [transform(row) for row in islice(cursor, chunk_size)]
+                else:
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
@@ -0,0 +1,184 @@
+import argparse
+import csv
+import gzip
+import io
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from app.database.db import RegulationDAO
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional; CSV is always available.
+    pa = None
+    pq = None
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _word_count(content: str) -> int:
+    return sum(1 for _ in WORD_RE.finditer(content))
+
+
+# Per dataset: source table and, per column, (SQL expression, type, optional Python transform).
+# Content blobs are never exported; metrics derive from them one row at a time.
+DATASETS: Dict[str, Tuple[str, Dict[str, Tuple[str, str, Optional[Callable]]]]] = {
+    "sections": ("regulations", {
+        "id": ("id", "int", None),
+        "title": ("title", "str", None),
+        "section_id": ("section_id", "str", None),
+        "date": ("date", "str", None),
+        "hash": ("hash", "str", None),
+    }),
+    "metrics": ("regulations", {
+        "id": ("id", "int", None),
+        "title": ("title", "str", None),
+        "section_id": ("section_id", "str", None),
+        "date": ("date", "str", None),
+        "char_count": ("length(content)", "int", None),
+        "word_count": ("content", "int", _word_count),
+    }),
+    "changes": ("changes", {
+        "id": ("id", "int", None),
+        "title": ("title", "str", None),
+        "section_id": ("section_id", "str", None),
+        "date": ("date", "str", None),
+        "old_hash": ("old_hash", "str", None),
+        "new_hash": ("new_hash", "str", None),
+    }),
+}
+
+
+def iter_dataset(dao: RegulationDAO, dataset: str, columns: Sequence[str] = None, start_date: str = None,
+                 end_date: str = None, chunk_size: int = 1000) -> Tuple[List[str], Iterator[List[Tuple]]]:
+    """Return the projected column names and an iterator over row chunks of a dataset.
+
+    Only the requested columns are read from SQLite, and rows are filtered to
+    start_date <= date <= end_date when those are given. Rows come in insertion order.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset {dataset!r}; expected one of {sorted(DATASETS)}")
+    table, spec = DATASETS[dataset]
+    columns = list(columns or spec)
+    unknown = [column for column in columns if column not in spec]
+    if unknown:
+        raise ValueError(f"Unknown columns for {dataset}: {unknown}")
+
+    query = f"SELECT {', '.join(spec[column][0] for column in columns)} FROM {table}"
+    conditions, params = [], []
+    if start_date:
+        conditions.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("date <= ?")
+        params.append(end_date)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # Rowid order streams straight off the table; sorting by date would buffer every row (and blob) first.
+    query += " ORDER BY id"
+
+    transforms = [spec[column][2] for column in columns]
+
+    def transform_row(row: Tuple) -> Tuple:
+        return tuple(transform(value) if transform else value for transform, value in zip(transforms, row))
+
+    # Rows are transformed one at a time as they are fetched, so at most one content blob is in memory.
+    return columns, dao.iter_rows(query, params, chunk_size, transform_row if any(transforms) else None)
+
+
+def iter_csv(columns: List[str], chunks: Iterator[List[Tuple]]) -> Iterator[str]:
+    """Render row chunks as CSV text, one string per chunk, header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _write_parquet(output_path: str, dataset: str, columns: List[str], chunks: Iterator[List[Tuple]]) -> int:
+    types = {"int": pa.int64(), "str": pa.string()}
+    spec = DATASETS[dataset][1]
+    schema = pa.schema([(column, types[spec[column][1]]) for column in columns])
+    written = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for rows in chunks:
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)], schema=schema))
+            written += len(rows)
+    return written
+
+
+def _write_csv(output_path: str, columns: List[str], chunks: Iterator[List[Tuple]]) -> int:
+    written = 0
+
+    def counted() -> Iterator[List[Tuple]]:
+        nonlocal written
+        for rows in chunks:
+            written += len(rows)
+            yield rows
+
+    opener = gzip.open if output_path.endswith(".gz") else open
+    with opener(output_path, "wt", newline="") as f:
+        for text in iter_csv(columns, counted()):
+            f.write(text)
+    return written
+
+
+def _infer_format(output_path: str) -> str:
+    if output_path.endswith(".parquet"):
+        return "parquet"
+    if output_path.endswith((".csv", ".csv.gz")):
+        return "csv"
+    raise ValueError(f"Cannot infer the export format of {output_path!r}; use a .parquet, .csv or .csv.gz "
+                     f"extension or pass fmt='parquet' or fmt='csv'")
+
+
+def export_dataset(dao: RegulationDAO, dataset: str, output_path: str, columns: Sequence[str] = None,
+                   start_date: str = None, end_date: str = None, fmt: str = "auto", chunk_size: int = 1000) -> int:
+    """Stream a dataset to Parquet or CSV (gzip-compressed when output_path ends in .gz).
+
+    fmt="auto" infers the format from the extension of output_path. Parquet needs
+    the optional pyarrow dependency (the "parquet" extra).
+    Returns the number of rows written.
+    """
+    if fmt == "auto":
+        fmt = _infer_format(output_path)
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"Unknown export format {fmt!r}; expected 'auto', 'parquet' or 'csv'")
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("Parquet export requires pyarrow; install the 'parquet' extra or write a .csv file")
+    columns, chunks = iter_dataset(dao, dataset, columns, start_date, end_date, chunk_size)
+    if fmt == "parquet":
+        written = _write_parquet(output_path, dataset, columns, chunks)
+    else:
+        written = _write_csv(output_path, columns, chunks)
+    logger.info(f"Exported {written} {dataset} rows to {output_path} ({fmt})")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export regulation sections, metrics or changes for analytics.")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("output", help="Output file (.parquet, .csv or .csv.gz)")
+    parser.add_argument("--db", default="ecfr.db")
+    parser.add_argument("--columns", nargs="*", help="Columns to export (default: all)")
+    parser.add_argument("--start-date")
+    parser.add_argument("--end-date")
+    parser.add_argument("--format", default="auto", choices=["auto", "parquet", "csv"],
+                        help="Output format (default: inferred from the output extension)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    export_dataset(RegulationDAO(db_file=args.db), args.dataset, args.output, args.columns,
+                   args.start_date, args.end_date, args.format, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
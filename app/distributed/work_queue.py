@@ -0,0 +1,313 @@
+import fcntl
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+WorkUnit = Tuple[int, str, str]  # (unit_id, title, date)
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue(ABC):
+    """Shared queue of (title, date) crawl units, claimed by workers under a lease.
+
+    A claimed unit whose lease is not renewed with heartbeat() before it expires is
+    handed to the next worker that calls claim(), so units held by a dead worker
+    are reassigned automatically. Units that fail, or whose lease lapses, on
+    max_attempts claims stay failed.
+    """
+
+    def __init__(self, max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        self.max_attempts = max_attempts
+        self.clock = clock
+
+    @abstractmethod
+    def enqueue(self, units: Iterable[Tuple[str, str]]) -> int:
+        """Add (title, date) units, skipping ones already queued. Returns the number added."""
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[WorkUnit]:
+        """Lease the next pending or expired unit to worker_id, or return None if there is none."""
+        ...
+
+    @abstractmethod
+    def heartbeat(self, unit_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """Extend the lease. Returns False if worker_id no longer holds the unit."""
+        ...
+
+    @abstractmethod
+    def complete(self, unit_id: int, worker_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, unit_id: int, worker_id: str, error: str) -> bool:
+        """Release the unit for another attempt, or mark it failed once max_attempts is reached."""
+        ...
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        ...
+
+    def is_drained(self) -> bool:
+        counts = self.counts()
+        return counts.get(PENDING, 0) == 0 and counts.get(CLAIMED, 0) == 0
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue stored in a SQLite file that every worker can open, e.g. on a shared volume."""
+
+    def __init__(self, db_file: str, max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        super().__init__(max_attempts, clock)
+        self.db_file = db_file
+        with self._transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS work_units (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker_id TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    UNIQUE (title, date)
+                )
+            """)
+            # Serves both claim lookups: units of one status, oldest date first.
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_work_units_status_date ON work_units (status, date, id)")
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two workers never claim the same unit.
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, units: Iterable[Tuple[str, str]]) -> int:
+        with self._transaction() as cursor:
+            cursor.executemany("INSERT OR IGNORE INTO work_units (title, date) VALUES (?, ?)",
+                               ((str(title), date) for title, date in units))
+            return cursor.rowcount
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[WorkUnit]:
+        now = self.clock()
+        with self._transaction() as cursor:
+            # A unit whose lease keeps lapsing (e.g. it crashes every worker) gives up like one that fails.
+            cursor.execute("""
+                UPDATE work_units SET status = 'failed', worker_id = NULL, lease_expires = NULL,
+                    error = COALESCE(error, 'lease expired')
+                WHERE status = 'claimed' AND lease_expires < ? AND attempts >= ?
+            """, (now, self.max_attempts))
+            # Two lookups rather than one OR, so each walks the (status, date, id) index without sorting.
+            candidates = [cursor.execute("""
+                SELECT id, title, date FROM work_units WHERE status = 'pending' ORDER BY date, id LIMIT 1
+            """).fetchone(), cursor.execute("""
+                SELECT id, title, date FROM work_units WHERE status = 'claimed' AND lease_expires < ?
+                ORDER BY date, id LIMIT 1
+            """, (now,)).fetchone()]
+            candidates = [row for row in candidates if row]
+            if not candidates:
+                return None
+            row = min(candidates, key=lambda row: (row[2], row[0]))
+            cursor.execute("""
+                UPDATE work_units SET status = 'claimed', worker_id = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE id = ?
+            """, (worker_id, now + lease_seconds, row[0]))
+            return row
+
+    def heartbeat(self, unit_id: int, worker_id: str, lease_seconds: float) -> bool:
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE work_units SET lease_expires = ?
+                WHERE id = ? AND worker_id = ? AND status = 'claimed'
+            """, (self.clock() + lease_seconds, unit_id, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, unit_id: int, worker_id: str) -> bool:
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE work_units SET status = 'done', lease_expires = NULL
+                WHERE id = ? AND worker_id = ? AND status = 'claimed'
+            """, (unit_id, worker_id))
+            return cursor.rowcount == 1
+
+    def fail(self, unit_id: int, worker_id: str, error: str) -> bool:
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE work_units
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    worker_id = NULL, lease_expires = NULL, error = ?
+                WHERE id = ? AND worker_id = ? AND status = 'claimed'
+            """, (self.max_attempts, error, unit_id, worker_id))
+            return cursor.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        # Read-only, so skip the write lock that _transaction takes.
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM work_units GROUP BY status").fetchall())
+        finally:
+            conn.close()
+
+
+class FileWorkQueue(WorkQueue):
+    """WorkQueue kept in a JSON file guarded by an flock, for hosts without a shared SQLite volume.
+
+    Units live in a single mapping keyed "title|date", the same shape a Redis hash
+    would hold, so the file can stand in for a key-value store during local runs.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        super().__init__(max_attempts, clock)
+        self.path = path
+        self.lock_path = f"{path}.lock"
+
+    @contextmanager
+    def _locked_state(self, exclusive: bool = True):
+        """Yield the parsed queue under an flock; mutators persist their changes with _save().
+
+        Reads take a shared lock and never rewrite the file, and mutators only rewrite it
+        when they actually changed something. Every operation still parses the whole file,
+        so prefer SQLiteWorkQueue for large backfills.
+        """
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                state = {"next_id": 1, "units": {}}
+                if os.path.exists(self.path):
+                    with open(self.path) as f:
+                        state = json.load(f)
+                yield state
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self, state: Dict):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _find(state: Dict, unit_id: int, worker_id: str) -> Optional[Dict]:
+        for unit in state["units"].values():
+            if unit["id"] == unit_id and unit["worker_id"] == worker_id and unit["status"] == CLAIMED:
+                return unit
+        return None
+
+    def enqueue(self, units: Iterable[Tuple[str, str]]) -> int:
+        added = 0
+        with self._locked_state() as state:
+            for title, date in units:
+                key = f"{title}|{date}"
+                if key in state["units"]:
+                    continue
+                state["units"][key] = {"id": state["next_id"], "title": str(title), "date": date, "status": PENDING,
+                                       "worker_id": None, "lease_expires": None, "attempts": 0, "error": None}
+                state["next_id"] += 1
+                added += 1
+            if added:
+                self._save(state)
+        return added
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[WorkUnit]:
+        now = self.clock()
+        with self._locked_state() as state:
+            claimable, exhausted = [], []
+            for unit in state["units"].values():
+                if unit["status"] == PENDING:
+                    claimable.append(unit)
+                elif unit["status"] == CLAIMED and unit["lease_expires"] < now:
+                    (exhausted if unit["attempts"] >= self.max_attempts else claimable).append(unit)
+            for unit in exhausted:
+                unit.update(status=FAILED, worker_id=None, lease_expires=None, error=unit["error"] or "lease expired")
+            if not claimable:
+                if exhausted:
+                    self._save(state)
+                return None
+            unit = min(claimable, key=lambda u: (u["date"], u["id"]))
+            unit.update(status=CLAIMED, worker_id=worker_id, lease_expires=now + lease_seconds,
+                        attempts=unit["attempts"] + 1)
+            self._save(state)
+            return unit["id"], unit["title"], unit["date"]
+
+    def heartbeat(self, unit_id: int, worker_id: str, lease_seconds: float) -> bool:
+        with self._locked_state() as state:
+            unit = self._find(state, unit_id, worker_id)
+            if unit:
+                unit["lease_expires"] = self.clock() + lease_seconds
+                self._save(state)
+            return unit is not None
+
+    def complete(self, unit_id: int, worker_id: str) -> bool:
+        with self._locked_state() as state:
+            unit = self._find(state, unit_id, worker_id)
+            if unit:
+                unit.update(status=DONE, lease_expires=None)
+                self._save(state)
+            return unit is not None
+
+    def fail(self, unit_id: int, worker_id: str, error: str) -> bool:
+        with self._locked_state() as state:
+            unit = self._find(state, unit_id, worker_id)
+            if unit:
+                status = FAILED if unit["attempts"] >= self.max_attempts else PENDING
+                unit.update(status=status, worker_id=None, lease_expires=None, error=error)
+                self._save(state)
+            return unit is not None
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._locked_state(exclusive=False) as state:
+            for unit in state["units"].values():
+                counts[unit["status"]] = counts.get(unit["status"], 0) + 1
+        return counts
+
+
+class SharedRateLimiter:
+    """Global request rate limit shared by every worker process through a SQLite file.
+
+    Each call to reserve() books the next free request slot and returns how long
+    the caller must wait before using it, so N workers together never exceed
+    requests_per_second.
+    """
+
+    def __init__(self, db_file: str, requests_per_second: float, clock: Callable[[], float] = time.time):
+        self.db_file = db_file
+        self.interval = 1.0 / requests_per_second
+        self.clock = clock
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (id INTEGER PRIMARY KEY CHECK (id = 1), next_slot REAL NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO rate_limit (id, next_slot) VALUES (1, 0)")
+        conn.close()
+
+    def reserve(self) -> float:
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            now = self.clock()
+            cursor.execute("SELECT next_slot FROM rate_limit WHERE id = 1")
+            slot = max(now, cursor.fetchone()[0])
+            cursor.execute("UPDATE rate_limit SET next_slot = ? WHERE id = 1", (slot + self.interval,))
+            cursor.execute("COMMIT")
+            return slot - now
+        finally:
+            conn.close()
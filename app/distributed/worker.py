@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+import aiohttp
+from loguru import logger
+
+from app.database.db import RegulationDAO
+from app.distributed.work_queue import FileWorkQueue, SharedRateLimiter, SQLiteWorkQueue, WorkQueue, WorkUnit
+from main import ECFRMonitor
+
+
+def date_range_units(titles: Iterable[str], start_date: str, end_date: str) -> List[Tuple[str, str]]:
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    units = []
+    for title in titles:
+        current = start
+        while current <= end:
+            units.append((str(title), current.strftime("%Y-%m-%d")))
+            current += timedelta(days=1)
+    return units
+
+
+class CrawlWorker:
+    """Claims (title, date) units from a shared WorkQueue and stores results in the shared database.
+
+    Run one worker per machine (or several per machine); throughput grows with the
+    number of workers while the SharedRateLimiter, if given, caps the combined
+    request rate against eCFR.
+    """
+
+    def __init__(self, queue: WorkQueue, monitor: ECFRMonitor, worker_id: str = None,
+                 lease_seconds: float = 120, concurrency: int = 4, poll_interval: float = 5):
+        self.queue = queue
+        self.monitor = monitor
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+
+    async def _heartbeat(self, unit_id: int, work: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(self.queue.heartbeat, unit_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"Worker {self.worker_id} lost the lease on unit {unit_id}; abandoning it")
+                work.cancel()
+                return
+
+    async def _process(self, session: aiohttp.ClientSession, unit: WorkUnit):
+        unit_id, title, date = unit
+        try:
+            _, _, content, content_hash = await self.monitor.fetch_content_with_retry(session, title, date)
+            if content is None:
+                await asyncio.to_thread(self.queue.fail, unit_id, self.worker_id, "fetch failed")
+                return
+            # Another worker may have taken the unit over while we fetched; leave the writes to it.
+            if not await asyncio.to_thread(self.queue.heartbeat, unit_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"Worker {self.worker_id} lost the lease on unit {unit_id} before storing it")
+                return
+            # Parsing and sqlite writes run in a thread so the heartbeat keeps ticking.
+            # record_snapshot is idempotent, so a unit re-run after a crash rewrites the same rows.
+            await asyncio.to_thread(self.monitor.ecfr_service.record_snapshot, title, date, content, content_hash)
+            await asyncio.to_thread(self.queue.complete, unit_id, self.worker_id)
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} failed unit {unit_id} (Title={title}, Date={date}): {e}")
+            await asyncio.to_thread(self.queue.fail, unit_id, self.worker_id, str(e))
+
+    async def process_unit(self, session: aiohttp.ClientSession, unit: WorkUnit):
+        """Process one claimed unit, cancelling it when a heartbeat finds its lease lost.
+
+        Cancellation stops the fetch, but not a record_snapshot already running in its
+        thread, so that write may still land after the lease moved on. It is idempotent,
+        so the new holder storing the same unit leaves the same rows.
+        """
+        work = asyncio.create_task(self._process(session, unit))
+        heartbeat = asyncio.create_task(self._heartbeat(unit[0], work))
+        try:
+            await asyncio.wait({work})
+        finally:
+            heartbeat.cancel()
+            work.cancel()
+
+    async def _loop(self, session: aiohttp.ClientSession):
+        while True:
+            unit = await asyncio.to_thread(self.queue.claim, self.worker_id, self.lease_seconds)
+            if unit:
+                await self.process_unit(session, unit)
+            elif await asyncio.to_thread(self.queue.is_drained):
+                return
+            else:
+                # Remaining units are leased by other workers; wait in case their leases expire.
+                await asyncio.sleep(self.poll_interval)
+
+    async def run(self):
+        logger.info(f"Worker {self.worker_id} started")
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(self._loop(session) for _ in range(self.concurrency)))
+        logger.info(f"Worker {self.worker_id} finished: {self.queue.counts()}")
+
+
+def open_queue(path: str) -> WorkQueue:
+    if path.endswith(".json"):
+        return FileWorkQueue(path)
+    return SQLiteWorkQueue(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed eCFR crawl over a shared work queue.")
+    parser.add_argument("--queue", default="crawl_queue.db", help="Queue file (.db for SQLite, .json for the file backend)")
+    parser.add_argument("--db", default="ecfr.db", help="Shared regulations database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="Queue every (title, date) unit in a date range")
+    enqueue.add_argument("--titles", nargs="*", help="Titles to crawl (default: all titles)")
+    enqueue.add_argument("--start-date", required=True)
+    enqueue.add_argument("--end-date", required=True)
+    enqueue.add_argument("--setup-database", action="store_true", help="Create the regulations tables if they are missing")
+
+    work = subparsers.add_parser("work", help="Claim and crawl units until the queue is drained")
+    work.add_argument("--concurrency", type=int, default=4)
+    work.add_argument("--lease-seconds", type=float, default=120)
+    work.add_argument("--rate-limit", type=float, default=5, help="Requests per second across all workers")
+
+    args = parser.parse_args()
+    queue = open_queue(args.queue)
+    dao = RegulationDAO(db_file=args.db)
+
+    if args.command == "enqueue":
+        monitor = ECFRMonitor(dao)
+        if args.setup_database:
+            monitor.setup_database()
+        titles = args.titles or monitor.get_all_titles()
+        added = queue.enqueue(date_range_units(titles, args.start_date, args.end_date))
+        logger.info(f"Queued {added} units: {queue.counts()}")
+    else:
+        dao.create_tables()
+        rate_limiter = SharedRateLimiter(f"{args.queue}.ratelimit.db", args.rate_limit)
+        monitor = ECFRMonitor(dao, rate_limiter)
+        worker = CrawlWorker(queue, monitor, lease_seconds=args.lease_seconds, concurrency=args.concurrency)
+        asyncio.run(worker.run())
+
+
+if __name__ == "__main__":
+    main()
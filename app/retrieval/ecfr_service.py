@@ -1,36 +1,144 @@
 from app.database.db import RegulationDAO
 import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
 from bs4 import BeautifulSoup
+from bs4.element import PreformattedString, Tag
+
+try:
+    import xxhash
+except ImportError:  # Optional; the blake2b fingerprint needs nothing beyond hashlib.
+    xxhash = None
+
+# Markup that changes with every amendment date without changing the regulation text.
+VOLATILE_ELEMENTS = ("AMDDATE",)
+VOLATILE_ATTRIBUTES = ("AMDDATE",)
+
+FINGERPRINT_ALGORITHMS = ("blake2b", "xxhash", "sha256")
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _escape(text: str, quote: bool = False) -> str:
+    text = text.replace("&", "&amp;").replace("<", "&lt;")
+    return text.replace('"', "&quot;") if quote else text
+
 
 class ECFRService:
-    def __init__(self, regulation_dao: RegulationDAO):
+    def __init__(self, regulation_dao: RegulationDAO, fingerprint_algorithm: str = "blake2b",
+                 volatile_elements: Iterable[str] = VOLATILE_ELEMENTS,
+                 volatile_attributes: Iterable[str] = VOLATILE_ATTRIBUTES):
+        if fingerprint_algorithm not in FINGERPRINT_ALGORITHMS:
+            raise ValueError(f"Unknown fingerprint algorithm {fingerprint_algorithm!r}; expected one of {FINGERPRINT_ALGORITHMS}")
+        if fingerprint_algorithm == "xxhash" and xxhash is None:
+            raise ValueError("The xxhash fingerprint requires the xxhash package")
         self.regulation_dao = regulation_dao
+        self.fingerprint_algorithm = fingerprint_algorithm
+        self.volatile_elements = frozenset(volatile_elements)
+        self.volatile_attributes = frozenset(volatile_attributes)
 
     def calculate_hash(self, content: str) -> str:
+        """SHA-256 of the exact content, used to address stored regulations."""
         return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
-    def store_regulation(self, title: str, section_id: str, date: str, content: str):
-        hash_value = self.calculate_hash(content)
+    def _append_children(self, node: Tag, parts: List[str]):
+        for child in node.contents:
+            if isinstance(child, Tag):
+                self._append_element(child, parts)
+            elif not isinstance(child, PreformattedString) and child.strip():
+                # Comments, declarations, PIs and whitespace between elements are noise. Text
+                # is collapsed rather than stripped, so the space between a word and inline markup survives.
+                parts.append(_escape(WHITESPACE_RE.sub(" ", child)))
+
+    def _append_element(self, tag: Tag, parts: List[str]):
+        if tag.name in self.volatile_elements:
+            return
+        # Escaped values keep N='a" B="c' from canonicalizing like two attributes.
+        attrs = "".join(f' {key}="{_escape(value, quote=True)}"' for key, value in sorted(tag.attrs.items())
+                        if key not in self.volatile_attributes)
+        parts.append(f"<{tag.name}{attrs}>")
+        self._append_children(tag, parts)
+        parts.append(f"</{tag.name}>")
+
+    def _canonical_parts(self, node: Tag) -> List[str]:
+        parts: List[str] = []
+        if isinstance(node, BeautifulSoup):
+            self._append_children(node, parts)
+        else:
+            self._append_element(node, parts)
+        return parts
+
+    def _digest(self, data: bytes) -> str:
+        if self.fingerprint_algorithm == "blake2b":
+            return hashlib.blake2b(data, digest_size=16).hexdigest()
+        if self.fingerprint_algorithm == "xxhash":
+            return xxhash.xxh3_128_hexdigest(data)
+        return hashlib.sha256(data).hexdigest()
+
+    def canonicalize(self, content: str) -> str:
+        """Normalize markup so formatting-only differences compare equal.
+
+        Drops volatile elements and attributes, sorts the remaining attributes and
+        collapses whitespace in text, leaving the regulation text itself untouched.
+        """
+        return "".join(self._canonical_parts(BeautifulSoup(content, 'xml')))
+
+    def tree_fingerprint(self, node: Tag) -> str:
+        """Fingerprint an already parsed element (or document) by its canonical form."""
+        return self._digest("".join(self._canonical_parts(node)).encode('utf-8'))
+
+    def _document_fingerprint(self, soup: BeautifulSoup, content: str) -> str:
+        parts = self._canonical_parts(soup)
+        # Content without any markup parses to an empty tree; compare its text instead.
+        canonical = "".join(parts) if parts else " ".join(content.split())
+        return self._digest(canonical.encode('utf-8'))
+
+    def fingerprint(self, content: str) -> str:
+        """Fast fingerprint of the canonical content, for change detection rather than addressing."""
+        return self._document_fingerprint(BeautifulSoup(content, 'xml'), content)
+
+    def store_regulation(self, title: str, section_id: str, date: str, content: str, hash_value: str = None):
+        hash_value = hash_value or self.calculate_hash(content)
         self.regulation_dao.insert_regulation(title, section_id, date, hash_value, content)
 
+    def section_fingerprints(self, content: str) -> Dict[str, str]:
+        """Fingerprint each <DIV8 TYPE="SECTION"> by its N attribute, or the whole document as 'full'."""
+        soup = BeautifulSoup(content, 'xml')
+        # Use <DIV8> for section-level changes as per guide. Fingerprints come straight
+        # from the parsed tree; re-serializing each section with str(div) cost more than the parse.
+        sections = {div.get('N', 'full'): self.tree_fingerprint(div) for div in soup.find_all('DIV8', TYPE='SECTION')}
+        return sections or {'full': self._document_fingerprint(soup, content)}
+
+    @staticmethod
+    def diff_sections(old: Dict[str, str], new: Dict[str, str]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """Return (section_id, old_hash, new_hash) for every section added, removed or changed."""
+        return [(section_id, old.get(section_id), new.get(section_id))
+                for section_id in sorted(old.keys() | new.keys())
+                if old.get(section_id) != new.get(section_id)]
+
     def track_changes(self, title: str, date: str, old_content: str, new_content: str):
-        soup_old = BeautifulSoup(old_content, 'xml')
-        soup_new = BeautifulSoup(new_content, 'xml')
-        
-        # Use <DIV8> for section-level changes as per guide
-        old_sections = {div.get('N', 'full'): str(div) for div in soup_old.find_all('DIV8', TYPE='SECTION')}
-        if not old_sections:
-            old_sections['full'] = old_content
-
-        new_sections = {div.get('N', 'full'): str(div) for div in soup_new.find_all('DIV8', TYPE='SECTION')}
-        if not new_sections:
-            new_sections['full'] = new_content
-
-        all_section_ids = set(old_sections.keys()) | set(new_sections.keys())
-        for section_id in all_section_ids:
-            old_text = old_sections.get(section_id, "")
-            new_text = new_sections.get(section_id, "")
-            old_hash = self.calculate_hash(old_text) if old_text else None
-            new_hash = self.calculate_hash(new_text) if new_text else None
-            if old_hash != new_hash:
-                self.regulation_dao.insert_change(title, section_id, date, old_hash, new_hash)
\ No newline at end of file
+        for section_id, old_hash, new_hash in self.diff_sections(self.section_fingerprints(old_content),
+                                                                 self.section_fingerprints(new_content)):
+            self.regulation_dao.insert_change(title, section_id, date, old_hash, new_hash)
+
+    def record_snapshot(self, title: str, date: str, content: str, hash_value: str = None, section_id: str = "full"):
+        """Store a snapshot and its changes when snapshots of a title may arrive in any date order.
+
+        The changes for date are diffed against the nearest earlier stored snapshot, and
+        the nearest later one is re-diffed against this snapshot, since it was previously
+        compared with an older date. Parsing happens outside the database lock; if another
+        snapshot of the title lands in between, the neighbours are re-read and the work redone.
+        Calling this twice with the same content leaves the same rows.
+        """
+        hash_value = hash_value or self.calculate_hash(content)
+        fingerprints = self.section_fingerprints(content)
+        while True:
+            preceding = self.regulation_dao.get_adjacent_content(title, section_id, date, before=True)
+            following = self.regulation_dao.get_adjacent_content(title, section_id, date, before=False)
+            changes = {date: self.diff_sections(self.section_fingerprints(preceding[1]), fingerprints) if preceding else []}
+            if following:
+                changes[following[0]] = self.diff_sections(fingerprints, self.section_fingerprints(following[1]))
+            if self.regulation_dao.store_snapshot(title, section_id, date, hash_value, content,
+                                                  preceding[0] if preceding else None,
+                                                  following[0] if following else None, changes):
+                return
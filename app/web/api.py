@@ -1,14 +1,63 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import threading
+import uuid
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from loguru import logger
 from app.database.db import RegulationDAO
 from app.analysis.ecfr_analyzer import eCFRAnalyzer
+from app.database.export import iter_csv, iter_dataset
 from main import ECFRMonitor
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 app = FastAPI(title="eCFR Analyzer API")
 dao = RegulationDAO()
 analyzer = eCFRAnalyzer(dao)
 monitor = ECFRMonitor()
 
+# Monitor jobs run in a worker thread after the response is sent; their status is kept here by job id.
+# Only the most recent finished jobs are kept; queued and running jobs are never pruned.
+monitor_jobs: Dict[str, Dict[str, str]] = {}
+MAX_FINISHED_JOBS = 100
+_jobs_lock = threading.Lock()
+
+# Derived dashboard data keyed by the data version it was computed from.
+# Handlers run concurrently in the threadpool, so the cache is only touched under its lock.
+_dashboard_cache: Dict[Tuple, Any] = {}
+_DASHBOARD_CACHE_SIZE = 32
+_dashboard_lock = threading.Lock()
+
+def _cached(key: Tuple, compute):
+    with _dashboard_lock:
+        if key in _dashboard_cache:
+            return _dashboard_cache[key]
+    # Compute outside the lock; two threads may both compute a missing key, which is harmless.
+    value = compute()
+    with _dashboard_lock:
+        while len(_dashboard_cache) >= _DASHBOARD_CACHE_SIZE:
+            _dashboard_cache.pop(next(iter(_dashboard_cache)))
+        _dashboard_cache[key] = value
+    return value
+
+def _add_monitor_job(job_id: str, job: Dict[str, str]):
+    with _jobs_lock:
+        finished = [existing for existing, state in monitor_jobs.items() if state["status"] in ("completed", "failed")]
+        for existing in finished[:max(0, len(finished) - MAX_FINISHED_JOBS + 1)]:
+            del monitor_jobs[existing]
+        monitor_jobs[job_id] = job
+
+def _run_monitor_job(job_id: str, agency_slug: str, title: str, start_date: str, end_date: str):
+    # A plain function, so Starlette runs it in its threadpool instead of on the server's event loop.
+    # Each job gets its own monitor and event loop; asyncio primitives cannot be shared across loops.
+    monitor_jobs[job_id]["status"] = "running"
+    try:
+        asyncio.run(ECFRMonitor(dao).monitor_agency_title(agency_slug, title, start_date, end_date))
+        monitor_jobs[job_id]["status"] = "completed"
+    except Exception as e:
+        logger.error(f"Monitor job {job_id} failed: {e}")
+        monitor_jobs[job_id]["status"] = "failed"
+        monitor_jobs[job_id]["error"] = str(e)
+
 @app.get("/agencies", response_model=List[Dict[str, Any]])
 async def get_agencies():
     return monitor.get_agencies()
@@ -18,9 +67,19 @@ async def get_titles(agency_slug: str):
     return monitor.get_titles_for_agency(agency_slug)
 
 @app.post("/monitor/{agency_slug}/{title}")
-async def monitor_agency_title(agency_slug: str, title: str, start_date: str, end_date: str):
-    await monitor.monitor_agency_title(agency_slug, title, start_date, end_date)
-    return {"message": f"Monitoring started for agency {agency_slug}, title {title}, from {start_date} to {end_date}"}
+async def monitor_agency_title(agency_slug: str, title: str, start_date: str, end_date: str, background_tasks: BackgroundTasks):
+    job_id = uuid.uuid4().hex
+    _add_monitor_job(job_id, {"status": "queued", "agency_slug": agency_slug, "title": title,
+                              "start_date": start_date, "end_date": end_date})
+    background_tasks.add_task(_run_monitor_job, job_id, agency_slug, title, start_date, end_date)
+    return {"message": f"Monitoring started for agency {agency_slug}, title {title}, from {start_date} to {end_date}",
+            "job_id": job_id}
+
+@app.get("/monitor/jobs/{job_id}", response_model=Dict[str, str])
+async def get_monitor_job(job_id: str):
+    if job_id not in monitor_jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown monitor job {job_id}")
+    return monitor_jobs[job_id]
 
 @app.get("/word_count_per_agency", response_model=Dict[str, int])
 async def get_word_count_per_agency():
@@ -35,4 +94,31 @@ async def get_historical_changes(start_date: str, end_date: str):
 @app.get("/keywords", response_model=List[tuple])
 async def get_keywords():
     result = analyzer.keywords_analysis()
-    return result if result is not None else []
\ No newline at end of file
+    return result if result is not None else []
+
+@app.get("/dashboard", response_model=Dict[str, Any])
+def get_dashboard(start_date: str, end_date: str, top_agencies: int = 25, max_points: int = 60):
+    """Everything the UI renders in one response, as compact pre-binned series.
+
+    Derived data is cached per data version, so repeated refreshes only recompute
+    what changed since the last call.
+    """
+    version = dao.get_data_version()
+    word_counts = _cached(("word_counts", version["regulations"], top_agencies),
+                          lambda: analyzer.bin_word_counts(analyzer.word_count_per_agency() or {}, top_agencies))
+    keywords = _cached(("keywords", version["regulations"]),
+                       lambda: analyzer.keywords_analysis() or [])
+    changes = _cached(("changes", version["changes"], start_date, end_date, max_points),
+                      lambda: analyzer.bin_changes(analyzer.historical_changes_over_time(start_date, end_date) or [], max_points))
+    return {"version": version, "word_counts": word_counts, "changes": changes, "keywords": keywords}
+
+@app.get("/export/{dataset}")
+def export_dataset(dataset: str, columns: Optional[List[str]] = Query(None), start_date: Optional[str] = None,
+                   end_date: Optional[str] = None):
+    """Stream sections, metrics or changes as CSV without loading the result set into memory."""
+    try:
+        names, chunks = iter_dataset(dao, dataset, columns, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(iter_csv(names, chunks), media_type="text/csv",
+                             headers={"Content-Disposition": f'attachment; filename="{dataset}.csv"'})
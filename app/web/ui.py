@@ -2,10 +2,20 @@ import gradio as gr
 import requests
 import seaborn as sns
 import matplotlib.pyplot as plt
-from typing import Dict, List, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple
 
 BASE_URL = "http://localhost:8000"
 
+# Rendered figures keyed by chart name and the data version they were drawn from.
+FIGURE_CACHE_SIZE = 16
+_figure_cache: Dict[Tuple, Any] = {}
+# Gradio runs handlers concurrently, and pyplot's global state is not thread-safe either,
+# so lookups, rendering and eviction all happen under one lock.
+_figure_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=4)
+
 def fetch_data(endpoint: str, params: Dict[str, str] = None) -> Any:
     response = requests.get(f"{BASE_URL}/{endpoint}", params=params)
     response.raise_for_status()
@@ -14,7 +24,8 @@ def fetch_data(endpoint: str, params: Dict[str, str] = None) -> Any:
 def trigger_monitor(agency_slug: str, title: str, start_date: str, end_date: str):
     response = requests.post(f"{BASE_URL}/monitor/{agency_slug}/{title}?start_date={start_date}&end_date={end_date}")
     response.raise_for_status()
-    return response.json()["message"]
+    body = response.json()
+    return f"{body['message']} (job {body['job_id']})"
 
 def update_titles(agency_slug: str):
     if not agency_slug:
@@ -22,9 +33,18 @@ def update_titles(agency_slug: str):
     titles = fetch_data(f"titles/{agency_slug}")
     return gr.update(choices=[(str(t), str(t)) for t in titles])
 
-def plot_word_count(word_counts: Dict[str, int]):
+def cached_figure(key: Tuple, render, *args):
+    with _figure_lock:
+        figure = _figure_cache.get(key)
+        if figure is None:
+            while len(_figure_cache) >= FIGURE_CACHE_SIZE:
+                plt.close(_figure_cache.pop(next(iter(_figure_cache))))
+            figure = _figure_cache[key] = render(*args)
+        return figure
+
+def plot_word_count(word_counts: Dict[str, List[Any]]):
     fig, ax = plt.subplots(figsize=(12, 6))
-    sns.barplot(x=list(word_counts.keys()), y=list(word_counts.values()), ax=ax, palette="viridis")
+    sns.barplot(x=word_counts["labels"], y=word_counts["values"], ax=ax, palette="viridis")
     plt.xticks(rotation=45, ha="right")
     plt.xlabel("Agency")
     plt.ylabel("Word Count")
@@ -32,10 +52,9 @@ def plot_word_count(word_counts: Dict[str, int]):
     plt.tight_layout()
     return fig
 
-def plot_changes(changes: List[List[Any]]):
+def plot_changes(changes: Dict[str, List[Any]]):
     fig, ax = plt.subplots(figsize=(10, 6))
-    dates, counts = zip(*changes) if changes else ([], [])
-    ax.plot(dates, counts, marker='o')
+    ax.plot(changes["dates"], changes["counts"], marker='o')
     plt.xticks(rotation=45, ha="right")
     plt.xlabel("Date")
     plt.ylabel("Change Count")
@@ -44,16 +63,17 @@ def plot_changes(changes: List[List[Any]]):
     return fig
 
 def main_interface(agency_slug: str, title: str, start_date: str, end_date: str):
-    monitor_msg = trigger_monitor(agency_slug, title, start_date, end_date) if agency_slug and title and start_date and end_date else "Select an agency, title, and date range to monitor."
+    # Start the monitor job and fetch the dashboard concurrently; neither waits on the crawl.
+    monitor_future = _executor.submit(trigger_monitor, agency_slug, title, start_date, end_date) if agency_slug and title and start_date and end_date else None
+    dashboard_future = _executor.submit(fetch_data, "dashboard", {"start_date": start_date, "end_date": end_date})
 
-    word_counts = fetch_data("word_count_per_agency")
-    changes = fetch_data("historical_changes", {"start_date": start_date, "end_date": end_date})
-    keywords = fetch_data("keywords")
-    
-    word_count_plot = plot_word_count(word_counts)
-    changes_plot = plot_changes(changes)
-    
-    keywords_str = "\n".join(f"{word}: {count}" for word, count in keywords)
+    dashboard = dashboard_future.result()
+    version = dashboard["version"]
+    word_count_plot = cached_figure(("word_count", version["regulations"]), plot_word_count, dashboard["word_counts"])
+    changes_plot = cached_figure(("changes", version["changes"], start_date, end_date), plot_changes, dashboard["changes"])
+
+    keywords_str = "\n".join(f"{word}: {count}" for word, count in dashboard["keywords"])
+    monitor_msg = monitor_future.result() if monitor_future else "Select an agency, title, and date range to monitor."
     
     return word_count_plot, changes_plot, keywords_str, monitor_msg
 
@@ -16,11 +16,13 @@ logger.add(lambda msg: print(msg, end=""), level="INFO", colorize=True)
 class ECFRMonitor:
     """Class to monitor eCFR titles with versioning and rate limiting."""
     
-    def __init__(self):
-        self.regulation_dao = RegulationDAO()
+    def __init__(self, regulation_dao: RegulationDAO = None, rate_limiter=None):
+        self.regulation_dao = regulation_dao or RegulationDAO()
         self.ecfr_service = ECFRService(self.regulation_dao)
         self.base_url = "https://www.ecfr.gov"
         self.semaphore = asyncio.Semaphore(10)
+        # Optional cross-process limiter (see app.distributed.work_queue.SharedRateLimiter).
+        self.rate_limiter = rate_limiter
 
     def setup_database(self):
         self.regulation_dao.create_tables()
@@ -53,6 +55,8 @@ class ECFRMonitor:
         for attempt in range(retries):
             try:
                 async with self.semaphore:
+                    if self.rate_limiter:
+                        await asyncio.sleep(await asyncio.to_thread(self.rate_limiter.reserve))
                     async with session.get(url) as response:
                         response.raise_for_status()
                         content = await response.text()
@@ -76,7 +80,7 @@ class ECFRMonitor:
             if content:
                 if prev_content:
                     self.ecfr_service.track_changes(title, date, prev_content, content)
-                self.ecfr_service.store_regulation(title, "full", date, content)
+                self.ecfr_service.store_regulation(title, "full", date, content, new_hash)
                 return content
             return None
 
@@ -109,7 +113,7 @@ class ECFRMonitor:
             results = await asyncio.gather(*tasks)
             for title, date, content, new_hash in results:
                 if content:
-                    self.ecfr_service.store_regulation(title, "full", date, content)
+                    self.ecfr_service.store_regulation(title, "full", date, content, new_hash)
 
 def main():
     monitor = ECFRMonitor()
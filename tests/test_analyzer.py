@@ -0,0 +1,26 @@
+from app.analysis.ecfr_analyzer import eCFRAnalyzer
+
+def test_bin_word_counts_folds_tail_into_other():
+    """Tests that bin_word_counts keeps the largest agencies and sums the rest into 'Other'."""
+    word_counts = {"A": 10, "B": 50, "C": 30, "D": 5}  # Unordered word counts.
+    binned = eCFRAnalyzer.bin_word_counts(word_counts, top_n=2)  # Keep the top two.
+    assert binned == {"labels": ["B", "C", "Other"], "values": [50, 30, 15]}  # Assert the tail is folded.
+
+def test_bin_word_counts_without_tail():
+    """Tests that no 'Other' bin is added when everything fits or the tail is all zeros."""
+    assert eCFRAnalyzer.bin_word_counts({"A": 1, "B": 2}, top_n=5) == {"labels": ["B", "A"], "values": [2, 1]}  # Everything fits.
+    assert eCFRAnalyzer.bin_word_counts({"A": 1, "B": 0}, top_n=1) == {"labels": ["A"], "values": [1]}  # Zero tail is dropped.
+    assert eCFRAnalyzer.bin_word_counts({}) == {"labels": [], "values": []}  # Empty input.
+
+def test_bin_changes_boundaries():
+    """Tests that bin_changes sums consecutive days and labels each bin by its first date."""
+    changes = [[f"2025-02-0{day}", day] for day in range(1, 6)]  # Five days with 1..5 changes.
+    assert eCFRAnalyzer.bin_changes(changes, max_points=5) == {
+        "dates": [row[0] for row in changes], "counts": [1, 2, 3, 4, 5]}  # Assert no binning when it fits.
+    assert eCFRAnalyzer.bin_changes(changes, max_points=2) == {
+        "dates": ["2025-02-01", "2025-02-04"], "counts": [6, 9]}  # Assert bins of three days, last one partial.
+    assert eCFRAnalyzer.bin_changes(changes, max_points=0)["counts"] == [1, 2, 3, 4, 5]  # Non-positive means no binning.
+
+def test_bin_changes_empty():
+    """Tests that bin_changes handles an empty series."""
+    assert eCFRAnalyzer.bin_changes([]) == {"dates": [], "counts": []}  # Assert empty series.
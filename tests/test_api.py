@@ -0,0 +1,174 @@
+import asyncio
+import csv
+import io
+import threading
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.analysis.ecfr_analyzer import eCFRAnalyzer
+from app.database.db import RegulationDAO
+from app.web import api
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Fixture to create a TestClient for the API backed by a temporary database.
+
+    Args:
+        tmp_path: Pytest fixture for a temporary directory.
+        monkeypatch: Pytest fixture for patching module state.
+
+    Returns:
+        TestClient: A client for the FastAPI app.
+    """
+    dao = RegulationDAO(db_file=str(tmp_path / "test_ecfr.db"))  # Create a RegulationDAO instance.
+    dao.create_tables()  # Create the necessary tables.
+    analyzer = eCFRAnalyzer(dao)  # Create an analyzer over the same database.
+    monkeypatch.setattr(analyzer, "_get_agency_mapping", lambda: {"1": "Agency A", "2": "Agency B"})  # Avoid the network.
+    monkeypatch.setattr(api, "dao", dao)  # Point the API at the temporary database.
+    monkeypatch.setattr(api, "analyzer", analyzer)
+    monkeypatch.setattr(api, "_dashboard_cache", {})  # Start with an empty cache.
+    monkeypatch.setattr(api, "monitor_jobs", {})  # Start with no jobs.
+    return TestClient(api.app)
+
+def test_dashboard_reuses_cache_until_data_changes(client: TestClient, monkeypatch):
+    """Tests that /dashboard recomputes derived data only after the underlying table changes.
+
+    Args:
+        client (TestClient): The TestClient fixture.
+        monkeypatch: Pytest fixture for patching module state.
+    """
+    calls = []  # Records each word count computation.
+    word_count_per_agency = api.analyzer.word_count_per_agency
+    monkeypatch.setattr(api.analyzer, "word_count_per_agency", lambda: calls.append(1) or word_count_per_agency())
+    params = {"start_date": "2025-02-01", "end_date": "2025-02-28"}
+
+    api.dao.insert_regulation("1", "full", "2025-02-01", "hash1", "one two three")  # Seed a regulation.
+    first = client.get("/dashboard", params=params).json()  # First refresh computes.
+    second = client.get("/dashboard", params=params).json()  # Second refresh hits the cache.
+    assert first == second  # Assert identical payloads.
+    assert len(calls) == 1  # Assert word counts were computed once.
+    assert first["word_counts"] == {"labels": ["Agency A", "Agency B"], "values": [3, 0]}  # Assert pre-binned series.
+
+    api.dao.insert_regulation("2", "full", "2025-02-02", "hash2", "four five")  # Change the data.
+    third = client.get("/dashboard", params=params).json()  # Refresh after the change.
+    assert len(calls) == 2  # Assert word counts were recomputed.
+    assert third["version"]["regulations"] != first["version"]["regulations"]  # Assert the version moved.
+    assert third["word_counts"]["values"] == [3, 2]  # Assert the new data is reflected.
+
+    api.dao.insert_change("1", "1.1", "2025-02-02", "old", "new")  # Change only the changes table.
+    fourth = client.get("/dashboard", params=params).json()  # Refresh after the change.
+    assert len(calls) == 2  # Assert word counts were not recomputed.
+    assert fourth["changes"] == {"dates": ["2025-02-02"], "counts": [1]}  # Assert the changes series updated.
+
+def test_monitor_job_lifecycle(client: TestClient, monkeypatch):
+    """Tests that /monitor returns a job id and the job moves through running to completed.
+
+    Args:
+        client (TestClient): The TestClient fixture.
+        monkeypatch: Pytest fixture for patching module state.
+    """
+    seen = []  # Job statuses observed while the monitor runs.
+
+    class FakeMonitor:
+        def __init__(self, dao):
+            pass
+
+        async def monitor_agency_title(self, agency_slug, title, start_date, end_date):
+            seen.extend(job["status"] for job in api.monitor_jobs.values())
+
+    monkeypatch.setattr(api, "ECFRMonitor", FakeMonitor)  # Avoid crawling eCFR.
+    response = client.post("/monitor/agency/7", params={"start_date": "2025-02-01", "end_date": "2025-02-02"})
+    job_id = response.json()["job_id"]  # The id of the started job.
+    assert seen == ["running"]  # Assert the job was running while the monitor ran.
+    assert client.get(f"/monitor/jobs/{job_id}").json()["status"] == "completed"  # Assert it completed.
+    assert client.get("/monitor/jobs/unknown").status_code == 404  # Assert unknown jobs are reported.
+
+def test_monitor_job_failure(client: TestClient, monkeypatch):
+    """Tests that an exception in the monitor marks the job failed with its error.
+
+    Args:
+        client (TestClient): The TestClient fixture.
+        monkeypatch: Pytest fixture for patching module state.
+    """
+    class FailingMonitor:
+        def __init__(self, dao):
+            pass
+
+        async def monitor_agency_title(self, agency_slug, title, start_date, end_date):
+            raise RuntimeError("eCFR unavailable")
+
+    monkeypatch.setattr(api, "ECFRMonitor", FailingMonitor)  # Make the crawl fail.
+    response = client.post("/monitor/agency/7", params={"start_date": "2025-02-01", "end_date": "2025-02-02"})
+    job = client.get(f"/monitor/jobs/{response.json()['job_id']}").json()  # Look the job up.
+    assert job["status"] == "failed"  # Assert the failure is recorded.
+    assert job["error"] == "eCFR unavailable"  # Assert the error is kept.
+
+def test_export_endpoint_handles_concurrent_streams(client: TestClient):
+    """Tests that concurrent /export streams succeed while their iterators hop between threadpool threads.
+
+    Args:
+        client (TestClient): The TestClient fixture, which points the API at a temporary database.
+    """
+    for day in range(1, 21):
+        api.dao.insert_regulation("7", "full", f"2025-02-{day:02d}", f"hash{day}", "word " * day)  # Seed twenty snapshots.
+
+    async def export_all():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            params = {"columns": ["date", "word_count"], "start_date": "2025-02-11"}
+            return await asyncio.gather(*(async_client.get("/export/metrics", params=params) for _ in range(8)))
+
+    responses = asyncio.run(export_all())  # Eight concurrent exports.
+    assert [response.status_code for response in responses] == [200] * 8  # Assert every export succeeded.
+    rows = list(csv.reader(io.StringIO(responses[0].text)))  # Parse one export.
+    assert rows[0] == ["date", "word_count"]  # Assert the projected header.
+    assert rows[1:] == [[f"2025-02-{day}", str(day)] for day in range(11, 21)]  # Assert the filtered rows.
+    assert client.get("/export/metrics", params={"columns": ["content"]}).status_code == 400  # Assert bad columns are rejected.
+
+def test_dashboard_cache_is_safe_under_concurrent_eviction(client: TestClient, monkeypatch):
+    """Tests that many threads filling and evicting a small cache never fail a lookup.
+
+    Args:
+        client (TestClient): The TestClient fixture, which starts the cache empty.
+        monkeypatch: Pytest fixture for patching module state.
+    """
+    monkeypatch.setattr(api, "_DASHBOARD_CACHE_SIZE", 2)  # Force constant eviction.
+    errors = []  # Exceptions raised by any thread.
+
+    def hammer(offset: int):
+        try:
+            for i in range(200):
+                key = ("test", (i + offset) % 7)
+                assert api._cached(key, lambda: key) == key  # Every caller gets its own value back.
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []  # Assert no KeyError or wrong value.
+    assert len(api._dashboard_cache) <= 2  # Assert the size bound held.
+
+def test_finished_monitor_jobs_are_pruned(client: TestClient, monkeypatch):
+    """Tests that only the most recent finished jobs are kept.
+
+    Args:
+        client (TestClient): The TestClient fixture.
+        monkeypatch: Pytest fixture for patching module state.
+    """
+    class FakeMonitor:
+        def __init__(self, dao):
+            pass
+
+        async def monitor_agency_title(self, agency_slug, title, start_date, end_date):
+            pass
+
+    monkeypatch.setattr(api, "ECFRMonitor", FakeMonitor)  # Avoid crawling eCFR.
+    monkeypatch.setattr(api, "MAX_FINISHED_JOBS", 2)  # Keep two finished jobs.
+    params = {"start_date": "2025-02-01", "end_date": "2025-02-02"}
+    job_ids = [client.post("/monitor/agency/7", params=params).json()["job_id"] for _ in range(5)]  # Run five jobs.
+    assert list(api.monitor_jobs) == job_ids[-2:]  # Assert only the two newest remain.
+    assert client.get(f"/monitor/jobs/{job_ids[0]}").status_code == 404  # Assert old jobs are gone.
@@ -67,4 +67,45 @@ def test_insert_change(regulation_dao: RegulationDAO):
         cursor.execute("SELECT * FROM changes WHERE title = 'Title3'")  # Execute a query to retrieve the change record.
         result = cursor.fetchone()  # Fetch the result.
         assert result is not None  # Assert the change record was inserted.
-        assert result[1] == "Title3"  # Assert the title is correct.
\ No newline at end of file
+        assert result[1] == "Title3"  # Assert the title is correct.
+
+def test_get_data_version(regulation_dao: RegulationDAO):
+    """Tests that get_data_version changes only for the table that was written to.
+
+    Args:
+        regulation_dao (RegulationDAO): The RegulationDAO fixture.
+    """
+    empty_version = regulation_dao.get_data_version()  # Version of the empty tables.
+    assert empty_version == {"regulations": "0", "changes": "0"}  # Assert empty tables share a version.
+    regulation_dao.insert_regulation("Title4", "Section4", "2023-01-04", "hash789", "Content4")  # Insert a regulation.
+    version = regulation_dao.get_data_version()  # Version after the insert.
+    assert version["regulations"] != empty_version["regulations"]  # Assert the regulations version moved.
+    assert version["changes"] == empty_version["changes"]  # Assert the changes version did not.
+
+def test_create_tables_keeps_data_unless_reset(regulation_dao: RegulationDAO):
+    """Tests that create_tables is safe to call again and only reset=True drops data.
+
+    Args:
+        regulation_dao (RegulationDAO): The RegulationDAO fixture.
+    """
+    regulation_dao.insert_regulation("Title5", "Section5", "2023-01-05", "hash5", "Content5")  # Insert a regulation.
+    regulation_dao.create_tables()  # Re-run setup, as every monitor job does.
+    assert regulation_dao.get_regulation_hash("Title5", "Section5") == "hash5"  # Assert the data survived.
+    regulation_dao.create_tables(reset=True)  # Explicitly reset.
+    assert regulation_dao.get_regulation_hash("Title5", "Section5") is None  # Assert the data is gone.
+
+def test_store_snapshot_rejects_stale_neighbours(regulation_dao: RegulationDAO):
+    """Tests that store_snapshot writes nothing when the neighbouring snapshots have moved.
+
+    Args:
+        regulation_dao (RegulationDAO): The RegulationDAO fixture.
+    """
+    changes = {"2023-01-02": [("1.1", "old", "new")]}  # Changes computed with no earlier snapshot in mind.
+    regulation_dao.insert_regulation("Title6", "full", "2023-01-01", "hash1", "Content1")  # An earlier snapshot lands first.
+    assert not regulation_dao.store_snapshot("Title6", "full", "2023-01-02", "hash2", "Content2", None, None, changes)  # Stale.
+    assert regulation_dao.get_adjacent_content("Title6", "full", "2023-01-03") == ("2023-01-01", "Content1")  # Assert nothing was stored.
+    assert regulation_dao.store_snapshot("Title6", "full", "2023-01-02", "hash2", "Content2", "2023-01-01", None, changes)  # Current.
+    assert regulation_dao.store_snapshot("Title6", "full", "2023-01-02", "hash2", "Content2", "2023-01-01", None, changes)  # Re-run.
+    with sqlite3.connect(regulation_dao.db_file) as conn:  # Connect to the database.
+        assert conn.execute("SELECT COUNT(*) FROM regulations WHERE title = 'Title6'").fetchone() == (2,)  # Assert no duplicates.
+        assert conn.execute("SELECT COUNT(*) FROM changes WHERE title = 'Title6'").fetchone() == (1,)  # Assert no duplicates.
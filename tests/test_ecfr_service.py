@@ -1,4 +1,7 @@
+import hashlib
+import time
 import pytest
+from bs4 import BeautifulSoup
 from app.retrieval.ecfr_service import ECFRService
 from app.database.db import RegulationDAO
 import sqlite3
@@ -83,4 +86,90 @@ def test_track_changes(ecfr_service: ECFRService):
         cursor = conn.cursor()  # Create a cursor.
         cursor.execute("SELECT * FROM changes WHERE title = 'Title1'")  # Execute a query to retrieve changes.
         result = cursor.fetchone()  # Fetch the result.
-        assert result is not None  # Assert a change was recorded.
\ No newline at end of file
+        assert result is not None  # Assert a change was recorded.
+
+def test_canonicalize_ignores_formatting_noise(ecfr_service: ECFRService):
+    """Tests that whitespace, attribute order and amendment dates do not survive canonicalize.
+
+    Args:
+        ecfr_service (ECFRService): The ECFRService fixture.
+    """
+    old = '<DIV8 N="1.1" TYPE="SECTION">\n  <AMDDATE>Jan. 1, 2025</AMDDATE>\n  <P>Text   here.</P>\n</DIV8>'  # Original markup.
+    new = "<DIV8 TYPE='SECTION' N=\"1.1\"><AMDDATE>Feb. 6, 2025</AMDDATE><P>Text here.</P></DIV8>"  # Reformatted markup.
+    assert ecfr_service.canonicalize(old) == '<DIV8 N="1.1" TYPE="SECTION"><P>Text here.</P></DIV8>'  # Assert the canonical form.
+    assert ecfr_service.fingerprint(old) == ecfr_service.fingerprint(new)  # Assert the fingerprints match.
+    assert ecfr_service.fingerprint(old) != ecfr_service.fingerprint(new.replace("here", "there"))  # Assert text edits are detected.
+
+def test_canonicalize_keeps_word_boundaries(ecfr_service: ECFRService):
+    """Tests that whitespace next to inline markup is collapsed, not dropped.
+
+    Args:
+        ecfr_service (ECFRService): The ECFRService fixture.
+    """
+    spaced = '<P>see\n  <I>paragraph</I>  (a)</P>'  # Words separated from inline markup by whitespace.
+    assert ecfr_service.canonicalize(spaced) == '<P>see <I>paragraph</I> (a)</P>'  # Assert single spaces remain.
+    assert ecfr_service.fingerprint(spaced) != ecfr_service.fingerprint('<P>see<I>paragraph</I>(a)</P>')  # Assert joined words differ.
+
+def test_canonicalize_escapes_attribute_values(ecfr_service: ECFRService):
+    """Tests that an attribute value containing quotes cannot collide with two attributes.
+
+    Args:
+        ecfr_service (ECFRService): The ECFRService fixture.
+    """
+    one = '<DIV8 N=\'1" TYPE="SECTION\'/>'  # One attribute whose value looks like two.
+    two = '<DIV8 N="1" TYPE="SECTION"/>'  # Two attributes.
+    assert ecfr_service.canonicalize(one) == '<DIV8 N="1&quot; TYPE=&quot;SECTION"></DIV8>'  # Assert the value is escaped.
+    assert ecfr_service.fingerprint(one) != ecfr_service.fingerprint(two)  # Assert no collision.
+
+def test_fingerprint_algorithm_is_configurable(tmp_path):
+    """Tests that the fingerprint algorithm can be chosen and is validated.
+
+    Args:
+        tmp_path: Pytest fixture for a temporary directory.
+    """
+    dao = RegulationDAO(db_file=str(tmp_path / "test_ecfr.db"))  # Create a RegulationDAO instance.
+    assert len(ECFRService(dao).fingerprint("<P>x</P>")) == 32  # Assert the default 128-bit blake2b digest.
+    assert len(ECFRService(dao, fingerprint_algorithm="sha256").fingerprint("<P>x</P>")) == 64  # Assert sha256 is available.
+    with pytest.raises(ValueError):
+        ECFRService(dao, fingerprint_algorithm="md5")  # Assert unknown algorithms are rejected.
+
+def test_track_changes_skips_formatting_only_changes(ecfr_service: ECFRService):
+    """Tests that track_changes records no change when only formatting differs.
+
+    Args:
+        ecfr_service (ECFRService): The ECFRService fixture.
+    """
+    old = '<DIV8 N="1.1" TYPE="SECTION"><AMDDATE>Jan. 1, 2025</AMDDATE><P>Text</P></DIV8>'  # Original section.
+    new = '<DIV8 TYPE="SECTION" N="1.1">\n<AMDDATE>Feb. 6, 2025</AMDDATE>\n<P>Text</P>\n</DIV8>'  # Reformatted section.
+    ecfr_service.track_changes("Title1", "2023-01-02", old, new)  # Track changes between the two.
+    with sqlite3.connect(ecfr_service.regulation_dao.db_file) as conn:  # Connect to the database.
+        cursor = conn.cursor()  # Create a cursor.
+        cursor.execute("SELECT COUNT(*) FROM changes WHERE title = 'Title1'")  # Count recorded changes.
+        assert cursor.fetchone()[0] == 0  # Assert no spurious change was recorded.
+
+@pytest.mark.benchmark
+def test_section_fingerprints_outpace_serialized_hashing(ecfr_service: ECFRService):
+    """Benchmarks tree fingerprints against hashing each re-serialized section, the previous approach.
+
+    Timing-dependent, so it only runs with -m benchmark.
+
+    Args:
+        ecfr_service (ECFRService): The ECFRService fixture.
+    """
+    section = ('<DIV8 N="{i}" TYPE="SECTION">\n  <HEAD>Section {i}.</HEAD>\n'
+               + "".join(f'  <P>({c}) Paragraph text with <I>emphasis</I> and   spacing &amp; entities.</P>\n' for c in "abcdef")
+               + '</DIV8>\n')  # A typical section with formatting noise.
+    content = "<ECFR><DIV5>" + "".join(section.format(i=i) for i in range(300)) + "</DIV5></ECFR>"  # A 300-section title.
+    divs = BeautifulSoup(content, 'xml').find_all('DIV8', TYPE='SECTION')  # Parse once, as track_changes does.
+
+    def best_of_three(fn) -> float:
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    serialized = best_of_three(lambda: [hashlib.sha256(str(div).encode('utf-8')).hexdigest() for div in divs])
+    tree = best_of_three(lambda: [ecfr_service.tree_fingerprint(div) for div in divs])
+    assert tree * 2 < serialized  # Assert at least a 2x speedup (about 5x locally).
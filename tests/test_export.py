@@ -0,0 +1,109 @@
+import csv
+import gzip
+import sqlite3
+import pytest
+
+from app.database.db import RegulationDAO
+from app.database import export
+from app.database.export import export_dataset, iter_dataset
+
+@pytest.fixture
+def populated_dao(tmp_path):
+    """Fixture to create a RegulationDAO with regulations and changes across three dates.
+
+    Args:
+        tmp_path: Pytest fixture for a temporary directory.
+
+    Returns:
+        RegulationDAO: An instance of RegulationDAO with test rows.
+    """
+    dao = RegulationDAO(db_file=str(tmp_path / "test_ecfr.db"))  # Create a RegulationDAO instance.
+    dao.create_tables()  # Create the necessary tables.
+    for day, content in [("01", "one two"), ("02", "one two three"), ("03", "four")]:
+        dao.insert_regulation("7", "full", f"2025-02-{day}", f"hash{day}", content)  # Insert a regulation per date.
+        dao.insert_change("7", "full", f"2025-02-{day}", "old", f"hash{day}")  # Insert a change per date.
+    return dao
+
+def test_iter_dataset_projects_and_filters(populated_dao: RegulationDAO):
+    """Tests column projection, date filtering and chunking of iter_dataset.
+
+    Args:
+        populated_dao (RegulationDAO): The populated RegulationDAO fixture.
+    """
+    columns, chunks = iter_dataset(populated_dao, "metrics", ["date", "word_count"],
+                                   start_date="2025-02-02", chunk_size=1)  # Project two columns from 02-02 on.
+    chunks = list(chunks)  # Consume the iterator.
+    assert columns == ["date", "word_count"]  # Assert the projection is kept in order.
+    assert chunks == [[("2025-02-02", 3)], [("2025-02-03", 1)]]  # Assert one row per chunk, filtered by date.
+
+def test_iter_dataset_rejects_unknown_columns(populated_dao: RegulationDAO):
+    """Tests that iter_dataset refuses columns outside the dataset, such as content.
+
+    Args:
+        populated_dao (RegulationDAO): The populated RegulationDAO fixture.
+    """
+    with pytest.raises(ValueError):
+        iter_dataset(populated_dao, "sections", ["content"])  # Content blobs are not exportable.
+
+def test_export_dataset_csv_gz(populated_dao: RegulationDAO, tmp_path):
+    """Tests exporting changes to a gzip-compressed CSV file.
+
+    Args:
+        populated_dao (RegulationDAO): The populated RegulationDAO fixture.
+        tmp_path: Pytest fixture for a temporary directory.
+    """
+    output = tmp_path / "changes.csv.gz"  # Output file.
+    written = export_dataset(populated_dao, "changes", str(output), ["date", "new_hash"],
+                             end_date="2025-02-02", fmt="csv", chunk_size=1)  # Export two rows.
+    assert written == 2  # Assert the row count is reported.
+    with gzip.open(output, "rt", newline="") as f:
+        rows = list(csv.reader(f))  # Read the export back.
+    assert rows == [["date", "new_hash"], ["2025-02-01", "hash01"], ["2025-02-02", "hash02"]]  # Assert the contents.
+
+def test_metrics_query_streams_without_sorting(populated_dao: RegulationDAO, monkeypatch):
+    """Tests that the metrics query scans in rowid order instead of sorting every content blob first.
+
+    Args:
+        populated_dao (RegulationDAO): The populated RegulationDAO fixture.
+        monkeypatch: Pytest fixture for patching the DAO.
+    """
+    queries = []  # Captures the query iter_dataset builds.
+    monkeypatch.setattr(populated_dao, "iter_rows", lambda query, params, chunk_size, transform=None: queries.append((query, params)) or iter([]))
+    list(iter_dataset(populated_dao, "metrics", start_date="2025-02-02")[1])  # Build and run the query.
+    query, params = queries[0]
+    with sqlite3.connect(populated_dao.db_file) as conn:  # Connect to the database.
+        plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))  # Ask SQLite for its plan.
+    assert "TEMP B-TREE" not in plan  # Assert no sort buffers the rows.
+
+def test_export_dataset_parquet(populated_dao: RegulationDAO, tmp_path):
+    """Tests that a .parquet output is written as Parquet with the dataset's column types.
+
+    Args:
+        populated_dao (RegulationDAO): The populated RegulationDAO fixture.
+        tmp_path: Pytest fixture for a temporary directory.
+    """
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = tmp_path / "metrics.parquet"  # Output file.
+    written = export_dataset(populated_dao, "metrics", str(output), ["date", "word_count"], chunk_size=2)  # Infer Parquet.
+    assert written == 3  # Assert the row count is reported.
+    table = pq.read_table(output)  # Read the export back.
+    assert table.schema.field("word_count").type == "int64"  # Assert the declared type.
+    assert table.to_pydict() == {"date": ["2025-02-01", "2025-02-02", "2025-02-03"], "word_count": [2, 3, 1]}
+
+def test_export_dataset_infers_format_from_extension(populated_dao: RegulationDAO, tmp_path, monkeypatch):
+    """Tests that fmt="auto" follows the output extension and refuses to guess.
+
+    Args:
+        populated_dao (RegulationDAO): The populated RegulationDAO fixture.
+        tmp_path: Pytest fixture for a temporary directory.
+        monkeypatch: Pytest fixture for hiding pyarrow.
+    """
+    output = tmp_path / "sections.csv"  # CSV output, even when pyarrow is installed.
+    export_dataset(populated_dao, "sections", str(output), ["date"])  # Export with fmt="auto".
+    assert output.read_text().splitlines()[:2] == ["date", "2025-02-01"]  # Assert it is CSV.
+    with pytest.raises(ValueError):
+        export_dataset(populated_dao, "sections", str(tmp_path / "sections.out"))  # Unknown extension.
+    monkeypatch.setattr(export, "pq", None)  # Pretend pyarrow is missing.
+    with pytest.raises(RuntimeError):
+        export_dataset(populated_dao, "sections", str(tmp_path / "sections.parquet"))  # Parquet cannot silently become CSV.
+    assert not (tmp_path / "sections.parquet").exists()  # Assert nothing was written.
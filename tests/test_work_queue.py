@@ -0,0 +1,186 @@
+import sqlite3
+import pytest
+
+from app.distributed.work_queue import FileWorkQueue, SharedRateLimiter, SQLiteWorkQueue, WorkQueue
+
+class FakeClock:
+    """Manually advanced clock so lease expiry can be tested without sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock():
+    """Fixture to create a FakeClock shared by the queue under test.
+
+    Returns:
+        FakeClock: A clock starting at t=1000.
+    """
+    return FakeClock()
+
+@pytest.fixture(params=["sqlite", "file"])
+def work_queue(request, tmp_path, clock):
+    """Fixture to create each WorkQueue backend for testing.
+
+    Args:
+        request: Pytest request carrying the backend name.
+        tmp_path: Pytest fixture for a temporary directory.
+        clock: The FakeClock fixture.
+
+    Returns:
+        WorkQueue: An empty queue with max_attempts=2.
+    """
+    if request.param == "sqlite":
+        return SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2, clock=clock)
+    return FileWorkQueue(str(tmp_path / "queue.json"), max_attempts=2, clock=clock)
+
+def test_enqueue_skips_duplicates(work_queue: WorkQueue):
+    """Tests that enqueue only adds (title, date) units that are not already queued.
+
+    Args:
+        work_queue (WorkQueue): The WorkQueue fixture.
+    """
+    assert work_queue.enqueue([("7", "2025-02-10"), ("7", "2025-02-11")]) == 2  # Add two units.
+    assert work_queue.enqueue([("7", "2025-02-11"), ("12", "2025-02-10")]) == 1  # Only the new unit is added.
+    assert work_queue.counts() == {"pending": 3}  # Assert all three are pending.
+
+def test_claim_and_complete(work_queue: WorkQueue):
+    """Tests that claimed units are not handed out twice and can be completed.
+
+    Args:
+        work_queue (WorkQueue): The WorkQueue fixture.
+    """
+    work_queue.enqueue([("7", "2025-02-10"), ("7", "2025-02-11")])  # Add two units.
+    first = work_queue.claim("worker-a", lease_seconds=60)  # Worker A claims one.
+    second = work_queue.claim("worker-b", lease_seconds=60)  # Worker B claims the other.
+    assert {first[1:], second[1:]} == {("7", "2025-02-10"), ("7", "2025-02-11")}  # Assert distinct units.
+    assert work_queue.claim("worker-c", lease_seconds=60) is None  # Nothing left to claim.
+    assert not work_queue.complete(first[0], "worker-b")  # Assert a non-holder cannot complete.
+    assert work_queue.complete(first[0], "worker-a")  # Assert the holder can complete.
+    assert work_queue.counts() == {"done": 1, "claimed": 1}  # Assert the resulting state.
+    assert not work_queue.is_drained()  # Assert the queue still has work in flight.
+
+def test_expired_lease_is_reassigned(work_queue: WorkQueue, clock: FakeClock):
+    """Tests that a unit whose lease lapses moves to another worker, and heartbeats prevent that.
+
+    Args:
+        work_queue (WorkQueue): The WorkQueue fixture.
+        clock (FakeClock): The FakeClock fixture.
+    """
+    work_queue.enqueue([("7", "2025-02-10")])  # Add one unit.
+    unit = work_queue.claim("worker-a", lease_seconds=60)  # Worker A claims it.
+    clock.now += 45  # Advance within the lease.
+    assert work_queue.heartbeat(unit[0], "worker-a", lease_seconds=60)  # Worker A renews the lease.
+    clock.now += 45  # Still within the renewed lease.
+    assert work_queue.claim("worker-b", lease_seconds=60) is None  # Assert the unit is not reassigned.
+    clock.now += 30  # Worker A stops heartbeating and the lease lapses.
+    assert work_queue.claim("worker-b", lease_seconds=60) == unit  # Assert worker B takes it over.
+    assert not work_queue.heartbeat(unit[0], "worker-a", lease_seconds=60)  # Assert worker A lost the lease.
+    assert not work_queue.complete(unit[0], "worker-a")  # Assert worker A cannot complete it.
+    assert work_queue.complete(unit[0], "worker-b")  # Assert worker B can.
+    assert work_queue.is_drained()  # Assert nothing is left.
+
+def test_fail_retries_until_max_attempts(work_queue: WorkQueue):
+    """Tests that failed units are retried and then left failed after max_attempts.
+
+    Args:
+        work_queue (WorkQueue): The WorkQueue fixture.
+    """
+    work_queue.enqueue([("7", "2025-02-10")])  # Add one unit.
+    unit = work_queue.claim("worker-a", lease_seconds=60)  # First attempt.
+    assert work_queue.fail(unit[0], "worker-a", "boom")  # Fail it.
+    assert work_queue.counts() == {"pending": 1}  # Assert it is retried.
+    unit = work_queue.claim("worker-a", lease_seconds=60)  # Second attempt.
+    assert work_queue.fail(unit[0], "worker-a", "boom")  # Fail it again.
+    assert work_queue.counts() == {"failed": 1}  # Assert it is given up on.
+    assert work_queue.claim("worker-a", lease_seconds=60) is None  # Assert it is not handed out again.
+
+def test_shared_rate_limiter_spaces_requests(tmp_path, clock: FakeClock):
+    """Tests that limiters sharing a file book consecutive slots at the global rate.
+
+    Args:
+        tmp_path: Pytest fixture for a temporary directory.
+        clock (FakeClock): The FakeClock fixture.
+    """
+    db_file = str(tmp_path / "rate.db")  # Shared limiter state.
+    limiter_a = SharedRateLimiter(db_file, requests_per_second=2, clock=clock)  # Worker A's limiter.
+    limiter_b = SharedRateLimiter(db_file, requests_per_second=2, clock=clock)  # Worker B's limiter.
+    delays = [limiter_a.reserve(), limiter_b.reserve(), limiter_a.reserve()]  # Book three slots.
+    assert delays == [0.0, 0.5, 1.0]  # Assert slots are spaced across both workers.
+    clock.now += 5  # Let the limiter go idle.
+    assert limiter_b.reserve() == 0.0  # Assert an idle limiter does not delay.
+
+def test_incomplete_backend_cannot_be_created():
+    """Tests that a WorkQueue backend missing methods fails when it is created."""
+    class PartialQueue(WorkQueue):
+        def enqueue(self, units):
+            return 0
+
+    with pytest.raises(TypeError):
+        PartialQueue()  # Abstract methods are not implemented.
+
+def test_file_queue_reads_do_not_rewrite(tmp_path):
+    """Tests that read-only operations and empty claims leave the queue file untouched.
+
+    Args:
+        tmp_path: Pytest fixture for a temporary directory.
+    """
+    queue = FileWorkQueue(str(tmp_path / "queue.json"))  # Create a file-backed queue.
+    queue.enqueue([("7", "2025-02-10")])  # Add one unit.
+    queue.claim("worker-a", lease_seconds=60)  # Claim it.
+    written = (tmp_path / "queue.json").stat().st_mtime_ns  # Time of the last write.
+    assert queue.counts() == {"claimed": 1} and not queue.is_drained()  # Read the queue.
+    assert queue.claim("worker-b", lease_seconds=60) is None  # Nothing to claim.
+    assert (tmp_path / "queue.json").stat().st_mtime_ns == written  # Assert the file was not rewritten.
+
+def test_repeatedly_expired_lease_gives_up(work_queue: WorkQueue, clock: FakeClock):
+    """Tests that a unit whose lease lapses on every attempt ends up failed instead of cycling forever.
+
+    Args:
+        work_queue (WorkQueue): The WorkQueue fixture, with max_attempts=2.
+        clock (FakeClock): The FakeClock fixture.
+    """
+    work_queue.enqueue([("7", "2025-02-10"), ("7", "2025-02-11")])  # Add a poison unit and a healthy one.
+    for worker_id in ("worker-a", "worker-b"):
+        unit = work_queue.claim(worker_id, lease_seconds=60)  # Claim the poison unit.
+        assert unit[2] == "2025-02-10"
+        clock.now += 61  # The worker crashes and its lease lapses.
+    healthy = work_queue.claim("worker-c", lease_seconds=60)  # Claim after the last attempt expired.
+    assert healthy[2] == "2025-02-11"  # Assert the poison unit was skipped.
+    assert work_queue.counts() == {"failed": 1, "claimed": 1}  # Assert it was given up on.
+    assert work_queue.complete(healthy[0], "worker-c")  # Finish the healthy unit.
+    assert work_queue.claim("worker-c", lease_seconds=60) is None  # Assert nothing is handed out again.
+    assert work_queue.is_drained()  # Assert the queue drains.
+
+def test_sqlite_claim_uses_index(tmp_path, clock: FakeClock, monkeypatch):
+    """Tests that every statement claim runs is served by an index rather than a scan and sort.
+
+    Args:
+        tmp_path: Pytest fixture for a temporary directory.
+        clock (FakeClock): The FakeClock fixture.
+        monkeypatch: Pytest fixture for patching sqlite3.connect.
+    """
+    db_file = str(tmp_path / "queue.db")  # Queue database.
+    queue = SQLiteWorkQueue(db_file, clock=clock)  # Create the queue and its index.
+    queue.enqueue([("7", "2025-02-10")])  # Add one unit.
+    statements = []  # Statements claim executes, with their parameters bound.
+    connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", traced_connect)
+    queue.claim("worker-a", lease_seconds=60)  # Run a claim.
+    monkeypatch.undo()
+    queries = [s for s in statements if s.lstrip().startswith(("SELECT", "UPDATE"))]
+    assert len(queries) == 4  # The expiry sweep, both lookups and the claim itself.
+    with sqlite3.connect(db_file) as conn:  # Connect to the database.
+        for query in queries:
+            plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}"))  # Ask SQLite for its plan.
+            assert "USING INDEX" in plan or "INTEGER PRIMARY KEY" in plan, query  # Assert an index lookup.
+            assert "TEMP B-TREE" not in plan, query  # Assert no sort.
@@ -0,0 +1,138 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+
+from app.database.db import RegulationDAO
+from app.distributed.work_queue import SQLiteWorkQueue
+from app.distributed.worker import CrawlWorker
+from app.retrieval.ecfr_service import ECFRService
+
+def page(text: str) -> str:
+    """Build a one-section title document whose section 1.1 contains text."""
+    return f'<DIV5><DIV8 N="1.1" TYPE="SECTION"><P>{text}</P></DIV8></DIV5>'
+
+PAGES = {"2025-02-01": page("first"), "2025-02-02": page("second"), "2025-02-03": page("third")}
+
+class FakeClock:
+    """Manually advanced clock so leases can be stolen without sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeMonitor:
+    """Stands in for ECFRMonitor, serving pages from a dict instead of eCFR."""
+
+    def __init__(self, dao: RegulationDAO, pages: dict, on_fetch=None):
+        self.regulation_dao = dao
+        self.ecfr_service = ECFRService(dao)
+        self.pages = pages
+        self.on_fetch = on_fetch
+
+    async def fetch_content_with_retry(self, session, title: str, date: str):
+        if self.on_fetch:
+            await self.on_fetch(title, date)
+        content = self.pages.get(date)
+        return title, date, content, self.ecfr_service.calculate_hash(content) if content else None
+
+@pytest.fixture
+def setup(tmp_path):
+    """Fixture to create a RegulationDAO, a SQLiteWorkQueue and the clock driving the queue.
+
+    Args:
+        tmp_path: Pytest fixture for a temporary directory.
+
+    Returns:
+        tuple: The RegulationDAO, SQLiteWorkQueue and FakeClock.
+    """
+    dao = RegulationDAO(db_file=str(tmp_path / "test_ecfr.db"))  # Create a RegulationDAO instance.
+    dao.create_tables()  # Create the necessary tables.
+    clock = FakeClock()  # Clock shared with the queue.
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"), clock=clock)  # Create the shared queue.
+    return dao, queue, clock
+
+def rows(dao: RegulationDAO, query: str) -> list:
+    with sqlite3.connect(dao.db_file) as conn:
+        return conn.execute(query).fetchall()
+
+def test_out_of_order_completion_records_adjacent_changes(setup):
+    """Tests that changes are diffed against adjacent dates whatever order units complete in.
+
+    Args:
+        setup (tuple): The setup fixture.
+    """
+    dao, queue, clock = setup
+    monitor = FakeMonitor(dao, PAGES)  # Serve three different versions of the section.
+    worker = CrawlWorker(queue, monitor, worker_id="worker-a")
+    queue.enqueue([("7", date) for date in PAGES])  # Queue the three dates.
+    units = [queue.claim("worker-a", 60) for _ in PAGES]  # Claim them all, in date order.
+    for unit in (units[0], units[2], units[1]):  # Complete the middle date last.
+        asyncio.run(worker.process_unit(None, unit))
+
+    fingerprint = {date: monitor.ecfr_service.section_fingerprints(content)["1.1"] for date, content in PAGES.items()}
+    expected = [("2025-02-02", "1.1", fingerprint["2025-02-01"], fingerprint["2025-02-02"]),
+                ("2025-02-03", "1.1", fingerprint["2025-02-02"], fingerprint["2025-02-03"])]
+    query = "SELECT date, section_id, old_hash, new_hash FROM changes ORDER BY date"
+    assert rows(dao, query) == expected  # Assert only the adjacent-date changes exist.
+    assert queue.counts() == {"done": 3}  # Assert every unit completed.
+
+    monitor.ecfr_service.record_snapshot("7", "2025-02-02", PAGES["2025-02-02"])  # Re-run a unit, as after a crash.
+    assert rows(dao, query) == expected  # Assert no duplicate changes.
+    assert rows(dao, "SELECT COUNT(*) FROM regulations") == [(3,)]  # Assert no duplicate regulations.
+
+def test_lease_lost_before_store_skips_writes(setup):
+    """Tests that a worker whose unit was reassigned during the fetch does not write it.
+
+    Args:
+        setup (tuple): The setup fixture.
+    """
+    dao, queue, clock = setup
+
+    async def steal(title, date):
+        clock.now += 1000  # Let the lease lapse.
+        assert queue.claim("worker-b", 60)  # Another worker takes the unit over.
+
+    worker = CrawlWorker(queue, FakeMonitor(dao, PAGES, on_fetch=steal), worker_id="worker-a")
+    queue.enqueue([("7", "2025-02-01")])  # Queue one date.
+    asyncio.run(worker.process_unit(None, queue.claim("worker-a", 60)))  # Process it as worker A.
+    assert rows(dao, "SELECT COUNT(*) FROM regulations") == [(0,)]  # Assert worker A wrote nothing.
+    assert queue.counts() == {"claimed": 1}  # Assert worker B still holds the unit.
+
+def test_lease_lost_during_fetch_aborts_unit(setup):
+    """Tests that a failed heartbeat cancels the unit instead of waiting for the fetch to finish.
+
+    Args:
+        setup (tuple): The setup fixture.
+    """
+    dao, queue, clock = setup
+
+    async def steal_and_hang(title, date):
+        clock.now += 1000  # Let the lease lapse.
+        queue.claim("worker-b", 60)  # Another worker takes the unit over.
+        await asyncio.sleep(5)  # A slow fetch that the heartbeat should interrupt.
+
+    worker = CrawlWorker(queue, FakeMonitor(dao, PAGES, on_fetch=steal_and_hang), worker_id="worker-a",
+                         lease_seconds=0.06)  # Heartbeat every 20ms.
+    queue.enqueue([("7", "2025-02-01")])  # Queue one date.
+    started = time.monotonic()
+    asyncio.run(worker.process_unit(None, queue.claim("worker-a", 0.06)))  # Process it as worker A.
+    assert time.monotonic() - started < 1  # Assert the unit was abandoned early.
+    assert rows(dao, "SELECT COUNT(*) FROM regulations") == [(0,)]  # Assert nothing was written.
+
+def test_fetch_failure_releases_unit(setup):
+    """Tests that a failed fetch returns the unit to the queue with its error.
+
+    Args:
+        setup (tuple): The setup fixture.
+    """
+    dao, queue, clock = setup
+    worker = CrawlWorker(queue, FakeMonitor(dao, {}), worker_id="worker-a")  # No pages: every fetch fails.
+    queue.enqueue([("7", "2025-02-01")])  # Queue one date.
+    asyncio.run(worker.process_unit(None, queue.claim("worker-a", 60)))  # Process it.
+    assert queue.counts() == {"pending": 1}  # Assert it is available for a retry.
+    assert rows(dao, "SELECT COUNT(*) FROM regulations") == [(0,)]  # Assert nothing was written.
+    with sqlite3.connect(queue.db_file) as conn:
+        assert conn.execute("SELECT error FROM work_units").fetchone() == ("fetch failed",)  # Assert the error is kept.